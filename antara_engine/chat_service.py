@@ -2,27 +2,44 @@
 Chat service for Antarā Engine - The Dream Weaver AI
 """
 
-import google.generativeai as genai
 from sqlalchemy.orm import Session
 from database import ChatMessage, User, Memory, WorldNode
+from llm_cache import llm_cache
 from config import GEMINI_API_KEY, ANTARA_SYSTEM_PROMPT, CRYSTAL_LABYRINTH_RESPONSE, CRYSTAL_LABYRINTH_TRIGGERS
 import logging
+import threading
 from datetime import datetime
 
-# Configure Gemini
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-1.5-flash')
-else:
-    model = None
-    logging.warning("GEMINI_API_KEY not found. Chat service will use fallback responses.")
-
 logger = logging.getLogger(__name__)
 
+GEMINI_MODEL_NAME = 'gemini-1.5-flash'
+
 
 class ChatService:
     def __init__(self):
-        self.model = model
+        self._model = None
+        self._model_loaded = False
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self):
+        """Gemini model, configured on first use so importing this module stays cheap"""
+        if not self._model_loaded:
+            with self._model_lock:
+                if not self._model_loaded:
+                    if GEMINI_API_KEY:
+                        import google.generativeai as genai
+
+                        genai.configure(api_key=GEMINI_API_KEY)
+                        self._model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+                    else:
+                        logger.warning("GEMINI_API_KEY not found. Chat service will use fallback responses.")
+                    self._model_loaded = True
+        return self._model
+
+    def warm_up(self):
+        """Configure the Gemini client ahead of the first request"""
+        return self.model is not None
     
     def check_crystal_labyrinth_trigger(self, user_input: str) -> bool:
         """Check if user input contains Crystal Labyrinth trigger keywords"""
@@ -133,6 +150,18 @@ Dream Weaver:"""
             logger.error(f"Error generating AI response: {e}")
             return self._fallback_response(user_input), None
     
+    def _generate_cached(self, prompt: str, prompt_type: str) -> str:
+        """Generate text for a deterministic prompt, reusing any cached result"""
+        key = llm_cache.make_key(prompt, GEMINI_MODEL_NAME)
+        cached = llm_cache.get(key, prompt_type)
+        if cached is not None:
+            return cached
+
+        response = self.model.generate_content(prompt)
+        text = response.text.strip()
+        llm_cache.set(key, prompt_type, text)
+        return text
+
     def _fallback_response(self, user_input: str) -> str:
         """Fallback response when AI is not available"""
         return "A gentle mist swirls in your inner world, carrying whispers of understanding that will soon take clearer form."
@@ -156,8 +185,7 @@ Provide a response in this format:
 Title: [A poetic 2-4 word title]
 Summary: [A single sentence describing the theme or insight]"""
                 
-                summary_response = self.model.generate_content(summary_prompt)
-                summary_text = summary_response.text.strip()
+                summary_text = self._generate_cached(summary_prompt, "world_node")
                 
                 # Parse the response
                 lines = summary_text.split('\n')
@@ -208,8 +236,7 @@ SKIP: Not significant enough to remember
 
 Be selective - only remember truly meaningful personal insights."""
 
-                memory_response = self.model.generate_content(memory_prompt)
-                memory_text = memory_response.text.strip()
+                memory_text = self._generate_cached(memory_prompt, "memory")
 
                 if memory_text.startswith("REMEMBER:"):
                     memory_content = memory_text.replace("REMEMBER:", "").strip()
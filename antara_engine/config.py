@@ -25,6 +25,37 @@ ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://loc
 DEBUG = os.getenv("DEBUG", "true").lower() == "true"
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
+# Startup Configuration
+# Schema creation is a one-shot step (python init_db.py); set true to also run it on worker boot
+AUTO_CREATE_TABLES = os.getenv("AUTO_CREATE_TABLES", "false").lower() == "true"
+# Pooled connections each worker opens before serving traffic
+WARMUP_POOL_CONNECTIONS = int(os.getenv("WARMUP_POOL_CONNECTIONS", "2"))
+# Configure the Gemini client at startup instead of on the first chat request (adds to worker boot time)
+WARMUP_LLM_CLIENT = os.getenv("WARMUP_LLM_CLIENT", "false").lower() == "true"
+
+# Profiling Configuration (opt-in; disabled settings add no per-request work)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Antara-Profile")
+# Shared secret sent in PROFILE_HEADER to force a profile or download one; without it only DEBUG allows access
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+
+# Log SQL statements slower than this many milliseconds (0 disables)
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "0"))
+
+# LLM Result Cache Configuration
+# In-memory LRU entries per worker; the database tier is shared across workers
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_DB_ENABLED = os.getenv("LLM_CACHE_DB_ENABLED", "false").lower() == "true"
+# Time-to-live in seconds per prompt type
+LLM_CACHE_TTLS = {
+    "world_node": int(os.getenv("LLM_CACHE_TTL_WORLD_NODE", str(30 * 24 * 3600))),
+    "memory": int(os.getenv("LLM_CACHE_TTL_MEMORY", str(30 * 24 * 3600))),
+}
+
 # Antarā System Prompt - The Core Creative Loop
 ANTARA_SYSTEM_PROMPT = """You are the Dream Weaver, a mystical guide who speaks in metaphors and creates vivid inner landscapes. When someone shares their thoughts or feelings, you don't engage in conversation. Instead, you respond with a beautiful, metaphorical description of a new element that appears in their inner world - a place, object, creature, or phenomenon that reflects their emotional state.
 
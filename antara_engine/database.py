@@ -4,18 +4,37 @@ Database models and configuration for Antarā Engine
 
 from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, configure_mappers
 from datetime import datetime
 import os
+import threading
 from dotenv import load_dotenv
 
+from profiling import install_slow_query_log
+
 load_dotenv()
 
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./antara.db")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# The engine is created on first use so importing this module stays cheap
+_engine = None
+_engine_lock = threading.Lock()
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+def get_engine():
+    """Return the shared engine, creating it and binding SessionLocal on first call"""
+    global _engine
+    if _engine is None:
+        # get_db runs in the threadpool, so concurrent first requests can race here
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {})
+                install_slow_query_log(engine)
+                SessionLocal.configure(bind=engine)
+                _engine = engine
+    return _engine
 
 Base = declarative_base()
 
@@ -75,8 +94,19 @@ class WorldNode(Base):
     user = relationship("User", back_populates="world_nodes")
 
 
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_cache"
+
+    key = Column(String(64), primary_key=True)  # sha256 of model name + rendered prompt
+    prompt_type = Column(String, nullable=False)
+    response = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
 # Database dependency
 def get_db():
+    get_engine()
     db = SessionLocal()
     try:
         yield db
@@ -84,6 +114,22 @@ def get_db():
         db.close()
 
 
-# Create tables
+# Create tables (run once per deployment via init_db.py, not on every worker boot)
 def create_tables():
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
+
+
+# Warm-up
+def warm_up_pool(connections: int):
+    """Pre-open pooled connections and configure ORM mappers before the first request"""
+    configure_mappers()
+
+    engine = get_engine()
+    opened = []
+    try:
+        for _ in range(connections):
+            opened.append(engine.connect())
+    finally:
+        # Returning the connections leaves them open and idle in the pool
+        for conn in opened:
+            conn.close()
@@ -0,0 +1,20 @@
+"""
+One-shot schema setup for Antarā Engine
+
+Run once per deployment before starting the workers:
+
+    python init_db.py
+"""
+
+import logging
+import time
+
+from database import create_tables
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    create_tables()
+    logger.info(f"Database schema is up to date ({(time.perf_counter() - started) * 1000:.1f} ms)")
@@ -0,0 +1,179 @@
+"""
+Content-addressed cache for deterministic LLM prompts in Antarā Engine
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import LLMCacheEntry, SessionLocal, get_engine
+from config import LLM_CACHE_MAX_ENTRIES, LLM_CACHE_DB_ENABLED, LLM_CACHE_TTLS
+
+logger = logging.getLogger(__name__)
+
+# Used for prompt types without an entry in LLM_CACHE_TTLS
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+# Expired database rows are purged once every this many database writes
+PURGE_EVERY_WRITES = 100
+
+
+def _open_session() -> Session:
+    """Short-lived session for the database tier, separate from any request session"""
+    get_engine()
+    return SessionLocal()
+
+
+class LLMCache:
+    """Two-tier cache: a bounded in-memory LRU backed by an optional database table.
+
+    Keys cover the fully rendered prompt, so a hit needs the exact same prompt
+    again. The enrichment prompts embed the freshly generated ai_response, so
+    they only hit when the same (user_input, ai_response) pair recurs, not on
+    every resubmitted /chat turn.
+    """
+
+    def __init__(self, max_entries: int, ttls: dict, db_enabled: bool,
+                 session_factory: Callable[[], Session] = _open_session):
+        self.max_entries = max_entries
+        self.ttls = ttls
+        self.db_enabled = db_enabled
+        self.session_factory = session_factory
+        self._entries = OrderedDict()  # key -> (expires_at monotonic, response)
+        self._lock = threading.Lock()
+        self._counters = Counter()
+        self._db_writes = 0
+
+    @staticmethod
+    def make_key(prompt: str, model_name: str) -> str:
+        """Hash of the model name and the fully rendered prompt"""
+        return hashlib.sha256(f"{model_name}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def ttl_for(self, prompt_type: str) -> int:
+        return self.ttls.get(prompt_type, DEFAULT_TTL_SECONDS)
+
+    def get(self, key: str, prompt_type: str) -> Optional[str]:
+        """Return the cached response, checking memory first and then the database"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, response = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._counters[f"{prompt_type}.memory_hits"] += 1
+                    return response
+                del self._entries[key]
+
+        if self.db_enabled:
+            response = self._db_get(key)
+            if response is not None:
+                self._count(prompt_type, "db_hits")
+                return response
+
+        self._count(prompt_type, "misses")
+        return None
+
+    def set(self, key: str, prompt_type: str, response: str):
+        """Store a response in memory and, when enabled, in the database"""
+        ttl = self.ttl_for(prompt_type)
+        self._remember(key, response, ttl)
+
+        if self.db_enabled:
+            self._db_set(key, prompt_type, response, ttl)
+
+    def _db_get(self, key: str) -> Optional[str]:
+        db = self.session_factory()
+        try:
+            row = db.query(LLMCacheEntry).filter(LLMCacheEntry.key == key).first()
+            if row is None:
+                return None
+
+            now = datetime.utcnow()
+            if row.expires_at <= now:
+                db.delete(row)
+                db.commit()
+                return None
+
+            self._remember(key, row.response, (row.expires_at - now).total_seconds())
+            return row.response
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error reading LLM cache entry: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _db_set(self, key: str, prompt_type: str, response: str, ttl: int):
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            db.merge(LLMCacheEntry(
+                key=key,
+                prompt_type=prompt_type,
+                response=response,
+                created_at=now,
+                expires_at=now + timedelta(seconds=ttl)
+            ))
+            db.commit()
+        except IntegrityError:
+            # Another worker inserted the same key first; its cached value is equivalent
+            db.rollback()
+            logger.debug(f"LLM cache entry {key[:12]} already stored by another worker")
+            db.close()
+            return
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error writing LLM cache entry: {e}")
+            db.close()
+            return
+
+        with self._lock:
+            self._db_writes += 1
+            purge = self._db_writes % PURGE_EVERY_WRITES == 0
+        try:
+            if purge:
+                self._purge_expired(db)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error purging expired LLM cache entries: {e}")
+        finally:
+            db.close()
+
+    def _purge_expired(self, db: Session):
+        deleted = db.query(LLMCacheEntry).filter(
+            LLMCacheEntry.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
+        db.commit()
+        if deleted:
+            logger.info(f"Purged {deleted} expired LLM cache entries")
+
+    def _remember(self, key: str, response: str, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _count(self, prompt_type: str, counter: str):
+        with self._lock:
+            self._counters[f"{prompt_type}.{counter}"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "db_enabled": self.db_enabled,
+                "counters": dict(self._counters),
+            }
+
+
+# Global LLM cache instance
+llm_cache = LLMCache(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTLS, LLM_CACHE_DB_ENABLED)
@@ -2,24 +2,35 @@
 Main FastAPI application for Antarā Engine
 """
 
-from fastapi import FastAPI, Depends, HTTPException, status
+import time
+
+# Taken before the heavier imports below so startup timings include them
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, FileResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
 import json
 import asyncio
 import logging
+import os
 
-from database import get_db, create_tables, User, ChatMessage, Memory, WorldNode
+from database import get_db, create_tables, warm_up_pool, User, ChatMessage, Memory, WorldNode
 from chat_service import chat_service
-from config import ALLOWED_ORIGINS, DEBUG
+from llm_cache import llm_cache
+from config import ALLOWED_ORIGINS, DEBUG, PROFILING_ENABLED, AUTO_CREATE_TABLES, WARMUP_POOL_CONNECTIONS, WARMUP_LLM_CLIENT
+import profiling
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Startup timings in milliseconds, reported by /health so they can be tracked between releases
+startup_timings = {"import_ms": round((time.perf_counter() - _import_started) * 1000, 1)}
+
 # Create FastAPI app
 app = FastAPI(
     title="Antarā Engine",
@@ -36,8 +47,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Antara-Profile-Id"],
 )
 
+# Opt-in request profiling (only registered when enabled, so it costs nothing otherwise)
+if PROFILING_ENABLED:
+    app.add_middleware(profiling.ProfilingMiddleware)
+
 # Pydantic models for API
 class ChatRequest(BaseModel):
     message: str
@@ -70,9 +86,23 @@ class UserAction(BaseModel):
 # Startup event
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database and create tables"""
-    create_tables()
-    logger.info("Antarā Engine started successfully")
+    """Warm up the worker; schema creation runs once via init_db.py"""
+    started = time.perf_counter()
+
+    if AUTO_CREATE_TABLES:
+        create_tables()
+
+    try:
+        warm_up_pool(WARMUP_POOL_CONNECTIONS)
+    except Exception as e:
+        logger.error(f"Error warming up database pool: {e}")
+
+    if WARMUP_LLM_CLIENT:
+        chat_service.warm_up()
+
+    startup_timings["warm_up_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    startup_timings["total_ms"] = round((time.perf_counter() - _import_started) * 1000, 1)
+    logger.info(f"Antarā Engine started successfully (startup timings: {startup_timings})")
 
 # Root endpoint
 @app.get("/")
@@ -96,7 +126,7 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "antara-engine"}
+    return {"status": "healthy", "service": "antara-engine", "startup": startup_timings}
 
 # User management endpoints
 @app.post("/users", response_model=dict)
@@ -265,6 +295,38 @@ async def save_user_action(
         logger.error(f"Error saving user action: {e}")
         raise HTTPException(status_code=500, detail="Failed to save user action")
 
+# LLM cache statistics
+@app.get("/cache/llm/stats")
+async def get_llm_cache_stats():
+    """Hit/miss counters and size of the LLM result cache"""
+    return llm_cache.stats()
+
+# Profile download endpoints
+def require_profile_access(request: Request):
+    """Allow profile downloads only when profiling is enabled and the caller holds the profile token"""
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not profiling.is_authorized(request.headers):
+        raise HTTPException(status_code=403, detail="Not authorized to access profiles")
+
+@app.get("/profiles", dependencies=[Depends(require_profile_access)])
+async def get_profiles():
+    """List stored request profiles, newest first"""
+    return {"profiles": profiling.list_profiles()}
+
+@app.get("/profiles/{profile_id}", dependencies=[Depends(require_profile_access)])
+async def download_profile(profile_id: str):
+    """Download a stored profile in collapsed-stack format"""
+    if not profiling.is_valid_profile_id(profile_id):
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    path = profiling.profile_path(profile_id)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.txt")
+
 if __name__ == "__main__":
     import uvicorn
+    create_tables()
     uvicorn.run(app, host="0.0.0.0", port=8000)
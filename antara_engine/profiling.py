@@ -0,0 +1,241 @@
+"""
+Opt-in request profiling and SQL slow-query logging for Antarā Engine
+"""
+
+import hmac
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter
+from typing import List
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from config import (
+    DEBUG,
+    PROFILING_ENABLED,
+    PROFILE_HEADER,
+    PROFILE_TOKEN,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_INTERVAL_MS,
+    PROFILE_DIR,
+    PROFILE_MAX_FILES,
+    SLOW_QUERY_THRESHOLD_MS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Files whose frames count as the "call site" of a slow query
+CALL_SITE_FILES = ("chat_service.py", "main.py")
+
+
+class StackSampler:
+    """Samples the call stack of one thread at a fixed interval.
+
+    When target_frame is given, only stacks passing through that frame are
+    kept; on the event loop this isolates one request's task from the other
+    requests running alongside it. Samples are aggregated in collapsed-stack
+    format ("a;b;c count"), which flamegraph.pl and speedscope can open directly.
+    """
+
+    def __init__(self, thread_id: int, interval: float, target_frame=None, in_flight=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.target_frame = target_frame
+        self.in_flight = in_flight
+        self.samples = Counter()
+        self.other_samples = 0
+        self.max_in_flight = in_flight() if in_flight else 1
+        self.started_at = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="antara-profiler", daemon=True)
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.in_flight:
+                self.max_in_flight = max(self.max_in_flight, self.in_flight())
+
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            stack = []
+            in_target = self.target_frame is None
+            while frame is not None:
+                if frame is self.target_frame:
+                    in_target = True
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+
+            if in_target:
+                self.samples[";".join(reversed(stack))] += 1
+            else:
+                self.other_samples += 1
+
+    def render(self) -> str:
+        """Render samples as collapsed stacks, heaviest first"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles the requests selected by should_profile.
+
+    Unlike @app.middleware("http"), a plain ASGI middleware runs the endpoint
+    in the same task as itself, so the middleware's own frame marks every
+    stack that belongs to this request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        try:
+            if not should_profile(Headers(scope=scope)):
+                await self.app(scope, receive, send)
+                return
+
+            profile_id = uuid.uuid4().hex
+
+            async def send_with_profile_id(message):
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).append("X-Antara-Profile-Id", profile_id)
+                await send(message)
+
+            sampler = start_profile(sys._getframe(), lambda: self.in_flight)
+            try:
+                await self.app(scope, receive, send_with_profile_id)
+            finally:
+                sampler.stop()
+                save_profile(sampler, profile_id, scope["method"], scope["path"])
+        finally:
+            self.in_flight -= 1
+
+
+def is_authorized(headers) -> bool:
+    """Check the profile header against PROFILE_TOKEN (any value is accepted only in DEBUG without a token)"""
+    value = headers.get(PROFILE_HEADER, "")
+    if not value:
+        return False
+    if PROFILE_TOKEN:
+        return hmac.compare_digest(value.encode("utf-8"), PROFILE_TOKEN.encode("utf-8"))
+    return DEBUG
+
+
+def should_profile(headers) -> bool:
+    """Decide whether the current request should be profiled"""
+    if is_authorized(headers):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def start_profile(target_frame=None, in_flight=None) -> StackSampler:
+    """Start sampling the calling thread (the event loop for async endpoints)"""
+    sampler = StackSampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000, target_frame, in_flight)
+    sampler.start()
+    return sampler
+
+
+def save_profile(sampler: StackSampler, profile_id: str, method: str, path: str):
+    """Write a finished profile to PROFILE_DIR under profile_id"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+
+    header = (
+        f"# {method} {path}\n"
+        f"# duration_ms={sampler.duration * 1000:.1f} "
+        f"interval_ms={PROFILE_INTERVAL_MS} samples={sum(sampler.samples.values())} "
+        f"other_samples={sampler.other_samples} max_in_flight={sampler.max_in_flight}\n"
+        f"# Only this request's task on the event loop is sampled; threadpool work "
+        f"(sync dependencies such as get_db) is not included\n"
+    )
+    with open(profile_path(profile_id), "w") as f:
+        f.write(header + sampler.render() + "\n")
+
+    _prune_profiles()
+    logger.info(f"Saved profile {profile_id} for {method} {path} ({sampler.duration * 1000:.1f} ms)")
+
+
+def is_valid_profile_id(profile_id: str) -> bool:
+    """Profile ids are uuid4 hex strings; anything else could escape PROFILE_DIR"""
+    return len(profile_id) == 32 and all(c in "0123456789abcdef" for c in profile_id)
+
+
+def profile_path(profile_id: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{profile_id}.txt")
+
+
+def list_profiles() -> List[str]:
+    """Stored profile ids, newest first"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    files = [f for f in os.listdir(PROFILE_DIR) if f.endswith(".txt")]
+    files.sort(key=lambda f: os.path.getmtime(os.path.join(PROFILE_DIR, f)), reverse=True)
+    return [f[:-len(".txt")] for f in files]
+
+
+def _prune_profiles():
+    """Keep only the newest PROFILE_MAX_FILES profiles on disk"""
+    for profile_id in list_profiles()[PROFILE_MAX_FILES:]:
+        try:
+            os.remove(profile_path(profile_id))
+        except OSError:
+            pass
+
+
+def _find_call_site() -> str:
+    """Innermost application frame that issued the query"""
+    for frame in reversed(traceback.extract_stack()):
+        if os.path.basename(frame.filename) in CALL_SITE_FILES:
+            return f"{os.path.basename(frame.filename)}:{frame.lineno} in {frame.name}"
+    return "unknown"
+
+
+def install_slow_query_log(engine):
+    """Log statements slower than SLOW_QUERY_THRESHOLD_MS; no-op when disabled"""
+    if SLOW_QUERY_THRESHOLD_MS <= 0:
+        return
+
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start_time"].pop()) * 1000
+        if elapsed_ms >= SLOW_QUERY_THRESHOLD_MS:
+            logger.warning(
+                f"Slow query ({elapsed_ms:.1f} ms) at {_find_call_site()}: "
+                f"{statement} | params={parameters!r}"
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        # Failed statements never reach after_cursor_execute
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start_time"):
+            conn.info["query_start_time"].pop()
+
+    logger.info(f"Slow query log enabled (threshold {SLOW_QUERY_THRESHOLD_MS} ms)")
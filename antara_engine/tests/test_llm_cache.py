@@ -0,0 +1,234 @@
+"""
+Tests for the LLM result cache
+"""
+
+from datetime import datetime, timedelta
+
+import asyncio
+import logging
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import chat_service as chat_service_module
+import llm_cache as llm_cache_module
+from chat_service import ChatService
+from database import Base, LLMCacheEntry, User, WorldNode, Memory
+from llm_cache import LLMCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(llm_cache_module.time, "monotonic", fake)
+    return fake
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine, tables=[LLMCacheEntry.__table__])
+    return sessionmaker(bind=engine)
+
+
+def test_make_key_depends_on_model_name():
+    prompt = "Title: [A poetic 2-4 word title]"
+    assert LLMCache.make_key(prompt, "gemini-1.5-flash") == LLMCache.make_key(prompt, "gemini-1.5-flash")
+    assert LLMCache.make_key(prompt, "gemini-1.5-flash") != LLMCache.make_key(prompt, "gemini-1.5-pro")
+    assert LLMCache.make_key(prompt, "gemini-1.5-flash") != LLMCache.make_key(prompt + " ", "gemini-1.5-flash")
+
+
+def test_lru_evicts_least_recently_used(clock):
+    cache = LLMCache(max_entries=2, ttls={}, db_enabled=False)
+    cache.set("a", "memory", "A")
+    cache.set("b", "memory", "B")
+    assert cache.get("a", "memory") == "A"  # "b" is now least recently used
+
+    cache.set("c", "memory", "C")
+
+    assert cache.get("b", "memory") is None
+    assert cache.get("a", "memory") == "A"
+    assert cache.get("c", "memory") == "C"
+    assert cache.stats()["entries"] == 2
+
+
+def test_entries_expire_per_prompt_type(clock):
+    cache = LLMCache(max_entries=10, ttls={"world_node": 60, "memory": 600}, db_enabled=False)
+    cache.set("node", "world_node", "Title: Lighthouse")
+    cache.set("mem", "memory", "SKIP: Not significant enough to remember")
+
+    clock.now += 120
+
+    assert cache.get("node", "world_node") is None
+    assert cache.get("mem", "memory") == "SKIP: Not significant enough to remember"
+
+
+def test_counters_track_hits_and_misses(clock):
+    cache = LLMCache(max_entries=10, ttls={}, db_enabled=False)
+    assert cache.get("k", "memory") is None
+    cache.set("k", "memory", "REMEMBER: x")
+    cache.get("k", "memory")
+    cache.get("k", "memory")
+
+    assert cache.stats()["counters"] == {"memory.misses": 1, "memory.memory_hits": 2}
+
+
+def test_database_tier_is_shared_between_caches(clock, session_factory):
+    writer = LLMCache(max_entries=10, ttls={}, db_enabled=True, session_factory=session_factory)
+    reader = LLMCache(max_entries=10, ttls={}, db_enabled=True, session_factory=session_factory)
+
+    writer.set("k", "world_node", "Title: Lighthouse")
+
+    assert reader.get("k", "world_node") == "Title: Lighthouse"
+    assert reader.get("k", "world_node") == "Title: Lighthouse"
+    assert reader.stats()["counters"] == {"world_node.db_hits": 1, "world_node.memory_hits": 1}
+
+
+def test_expired_database_rows_are_deleted_on_read(clock, session_factory):
+    db = session_factory()
+    db.add(LLMCacheEntry(
+        key="old",
+        prompt_type="memory",
+        response="REMEMBER: x",
+        expires_at=datetime.utcnow() - timedelta(seconds=1)
+    ))
+    db.commit()
+    db.close()
+
+    cache = LLMCache(max_entries=10, ttls={}, db_enabled=True, session_factory=session_factory)
+    assert cache.get("old", "memory") is None
+
+    db = session_factory()
+    assert db.query(LLMCacheEntry).count() == 0
+    db.close()
+
+
+def test_writes_periodically_purge_expired_rows(clock, session_factory, monkeypatch):
+    monkeypatch.setattr(llm_cache_module, "PURGE_EVERY_WRITES", 1)
+    db = session_factory()
+    db.add(LLMCacheEntry(
+        key="old",
+        prompt_type="memory",
+        response="REMEMBER: x",
+        expires_at=datetime.utcnow() - timedelta(seconds=1)
+    ))
+    db.commit()
+    db.close()
+
+    cache = LLMCache(max_entries=10, ttls={}, db_enabled=True, session_factory=session_factory)
+    cache.set("new", "memory", "REMEMBER: y")
+
+    db = session_factory()
+    assert [row.key for row in db.query(LLMCacheEntry).all()] == ["new"]
+    db.close()
+
+
+def test_database_errors_fall_back_to_a_miss(clock):
+    # No llm_cache table exists on this engine, so every query fails
+    factory = sessionmaker(bind=create_engine("sqlite://"))
+    cache = LLMCache(max_entries=10, ttls={}, db_enabled=True, session_factory=factory)
+
+    assert cache.get("k", "memory") is None
+    cache.set("k", "memory", "REMEMBER: x")
+    assert cache.get("k", "memory") == "REMEMBER: x"
+
+
+class RaceLostSession:
+    """Session whose commit fails as if another worker inserted the key first"""
+
+    def merge(self, entry):
+        pass
+
+    def commit(self):
+        raise IntegrityError("INSERT INTO llm_cache", {}, Exception("UNIQUE constraint failed"))
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_lost_insert_race_is_not_an_error(clock, caplog):
+    cache = LLMCache(max_entries=10, ttls={}, db_enabled=True, session_factory=RaceLostSession)
+
+    with caplog.at_level(logging.DEBUG, logger="llm_cache"):
+        cache.set("k", "memory", "REMEMBER: x")
+
+    assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+    assert any("already stored by another worker" in r.getMessage() for r in caplog.records)
+    assert cache.get("k", "memory") == "REMEMBER: x"
+
+
+def test_purge_failure_is_reported_separately(clock, session_factory, monkeypatch, caplog):
+    monkeypatch.setattr(llm_cache_module, "PURGE_EVERY_WRITES", 1)
+    cache = LLMCache(max_entries=10, ttls={}, db_enabled=True, session_factory=session_factory)
+
+    def failing_purge(db):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(cache, "_purge_expired", failing_purge)
+    with caplog.at_level(logging.ERROR, logger="llm_cache"):
+        cache.set("k", "memory", "REMEMBER: x")
+
+    messages = [r.getMessage() for r in caplog.records]
+    assert messages == ["Error purging expired LLM cache entries: database is locked"]
+
+    db = session_factory()
+    assert db.query(LLMCacheEntry).count() == 1
+    db.close()
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    def __init__(self, text):
+        self.text = text
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        return StubResponse(self.text)
+
+
+def test_repeated_enrichment_calls_skip_the_model(clock, session_factory, monkeypatch):
+    monkeypatch.setattr(chat_service_module, "llm_cache", LLMCache(max_entries=10, ttls={}, db_enabled=False))
+    Base.metadata.create_all(bind=session_factory.kw["bind"])
+    db = session_factory()
+    db.add(User(user_id="u1", username="user_u1"))
+    db.commit()
+
+    service = ChatService()
+    service._model = StubModel("Title: The Patient Lighthouse\nSummary: A steady light in the fog.")
+    service._model_loaded = True
+
+    user_input = " ".join(["I keep waiting for someone to notice me"] * 4)
+    ai_response = "A lighthouse appears on a distant cliff in your inner world."
+    for _ in range(3):
+        asyncio.run(service._maybe_create_world_node(user_input, ai_response, "u1", db))
+
+    assert len(service.model.prompts) == 1
+    assert [node.title for node in db.query(WorldNode).all()] == ["The Patient Lighthouse"] * 3
+
+    # A different Dream Weaver reply renders a different prompt, so it is a miss
+    asyncio.run(service._maybe_create_world_node(user_input, ai_response + " It never dims.", "u1", db))
+    assert len(service.model.prompts) == 2
+    db.close()
@@ -0,0 +1,163 @@
+"""
+Tests for request profiling and the slow-query log
+"""
+
+import logging
+import os
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+import profiling
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_INTERVAL_MS", 1)
+    return tmp_path
+
+
+def test_token_must_match_when_configured(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "s3cret")
+    monkeypatch.setattr(profiling, "DEBUG", True)
+
+    assert profiling.is_authorized({"X-Antara-Profile": "s3cret"})
+    assert not profiling.is_authorized({"X-Antara-Profile": "1"})
+    assert not profiling.is_authorized({})
+
+
+def test_without_token_header_is_only_honoured_in_debug(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+
+    monkeypatch.setattr(profiling, "DEBUG", True)
+    assert profiling.is_authorized({"X-Antara-Profile": "1"})
+    assert not profiling.is_authorized({})
+
+    monkeypatch.setattr(profiling, "DEBUG", False)
+    assert not profiling.is_authorized({"X-Antara-Profile": "1"})
+
+
+def test_should_profile_uses_sample_rate(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "s3cret")
+
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 0)
+    assert not profiling.should_profile({})
+    assert profiling.should_profile({"X-Antara-Profile": "s3cret"})
+
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 1)
+    assert profiling.should_profile({})
+
+
+@pytest.mark.parametrize("profile_id, valid", [
+    ("0123456789abcdef0123456789abcdef", True),
+    ("0123456789ABCDEF0123456789ABCDEF", False),
+    ("../../../../etc/passwd", False),
+    ("..%2f..%2fantara.db", False),
+    ("", False),
+])
+def test_profile_id_validation(profile_id, valid):
+    assert profiling.is_valid_profile_id(profile_id) is valid
+
+
+def test_prune_keeps_newest_profiles(profile_dir, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_MAX_FILES", 2)
+    for i, profile_id in enumerate(["a" * 32, "b" * 32, "c" * 32]):
+        path = profiling.profile_path(profile_id)
+        open(path, "w").close()
+        os.utime(path, (1000 + i, 1000 + i))
+
+    profiling._prune_profiles()
+
+    assert profiling.list_profiles() == ["c" * 32, "b" * 32]
+
+
+def test_middleware_profiles_only_the_selected_request(profile_dir, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "s3cret")
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 0)
+
+    app = FastAPI()
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+    @app.get("/slow")
+    async def slow_endpoint():
+        started = time.perf_counter()
+        while time.perf_counter() - started < 0.05:
+            pass
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert "X-Antara-Profile-Id" not in client.get("/slow").headers
+
+    response = client.get("/slow", headers={"X-Antara-Profile": "s3cret"})
+    profile_id = response.headers["X-Antara-Profile-Id"]
+
+    assert profiling.list_profiles() == [profile_id]
+    with open(profiling.profile_path(profile_id)) as f:
+        content = f.read()
+    assert content.startswith("# GET /slow\n")
+    assert "max_in_flight=1" in content
+    assert "slow_endpoint (test_profiling.py:" in content
+
+
+def test_download_endpoint_requires_token_and_valid_id(profile_dir, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "s3cret")
+    profile_id = "d" * 32
+    with open(profiling.profile_path(profile_id), "w") as f:
+        f.write("# GET /chat\n")
+
+    client = TestClient(main.app)
+    auth = {"X-Antara-Profile": "s3cret"}
+
+    assert client.get(f"/profiles/{profile_id}").status_code == 403
+    assert client.get(f"/profiles/{profile_id}", headers=auth).text == "# GET /chat\n"
+    assert client.get("/profiles/" + "D" * 32, headers=auth).status_code == 404
+    assert client.get("/profiles", headers=auth).json() == {"profiles": [profile_id]}
+
+    monkeypatch.setattr(main, "PROFILING_ENABLED", False)
+    assert client.get(f"/profiles/{profile_id}", headers=auth).status_code == 404
+
+
+@pytest.fixture
+def slow_query_engine(monkeypatch):
+    monkeypatch.setattr(profiling, "SLOW_QUERY_THRESHOLD_MS", 0.000001)
+    monkeypatch.setattr(profiling, "CALL_SITE_FILES", ("test_profiling.py",))
+    engine = create_engine("sqlite://")
+    profiling.install_slow_query_log(engine)
+    return engine
+
+
+def test_slow_queries_are_logged_with_call_site(slow_query_engine, caplog):
+    with caplog.at_level(logging.WARNING, logger="profiling"):
+        with slow_query_engine.connect() as conn:
+            conn.exec_driver_sql("SELECT ?", (42,))
+
+    [record] = [r for r in caplog.records if "Slow query" in r.getMessage()]
+    message = record.getMessage()
+    assert "SELECT ?" in message
+    assert "params=(42,)" in message
+    assert "test_profiling.py:" in message and "test_slow_queries_are_logged_with_call_site" in message
+
+
+def test_failed_queries_do_not_leak_start_times(slow_query_engine):
+    with slow_query_engine.connect() as conn:
+        with pytest.raises(Exception):
+            conn.exec_driver_sql("SELECT * FROM missing_table")
+        assert conn.info["query_start_time"] == []
+
+        conn.exec_driver_sql("SELECT 1")
+        assert conn.info["query_start_time"] == []
+
+
+def test_slow_query_log_is_not_installed_when_disabled(monkeypatch):
+    monkeypatch.setattr(profiling, "SLOW_QUERY_THRESHOLD_MS", 0)
+    engine = create_engine("sqlite://")
+    profiling.install_slow_query_log(engine)
+
+    assert not engine.dispatch.before_cursor_execute